@@ -9,246 +9,408 @@ produces a Zotero RDF file for import into Zotero.
 
 import argparse
 import os
-import re
 import sys
-import xml.etree.ElementTree as ET
-from io import BytesIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from urllib.request import urlopen
+from xml.sax.saxutils import escape, quoteattr
 
-import pyuntl.untldoc
+from lxml import etree as ET
 
 
 TYPES = {'image_presentation': 'presentation'}
 
 ACCESS = {'public': 'https://digital2.library.unt.edu/vocabularies/rights-access/#public'}
 
-MEETING_PATTERN = re.compile(r'(?P<meeting>.*\d{4})(?:[,.] (?P<locality>[^0-9]+))?')
-
+CACHE_FILE = 'cached_untl_metadata.xml'
+
+# Number of records handed to a worker process at a time.
+RECORDS_PER_BATCH = 50
+
+OAI_NAMESPACE = 'http://www.openarchives.org/OAI/2.0/'
+
+UNTL_NAMESPACE = 'http://digital2.library.unt.edu/untl/'
+
+OAI_METADATA = ET.QName(OAI_NAMESPACE, 'metadata').text
+
+UNTL_NS = {'untl': UNTL_NAMESPACE}
+
+NSMAP = {
+    'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+    'z': 'http://www.zotero.org/namespaces/export#',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'vcard': 'http://nwalsh.com/rdf/vCard#',
+    'foaf': 'http://xmlns.com/foaf/0.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+    'bib': 'http://purl.org/net/biblio#',
+}
+
+
+def _untl_xpath(path):
+    """Compile an XPath expression over UNTL elements that returns plain strings."""
+    return ET.XPath(path, namespaces=UNTL_NS, smart_strings=False)
+
+
+XP_ABOUT_URI = _untl_xpath('untl:identifier[@qualifier="itemURL"]/text()')
+XP_TITLE = _untl_xpath('untl:title[@qualifier="officialtitle"]/text()')
+XP_SUBJECTS = _untl_xpath('untl:subject/text()')
+XP_ABSTRACT = _untl_xpath('untl:description[@qualifier="content"]/text()')
+XP_CREATION_DATE = _untl_xpath('untl:date[@qualifier="creation"]/text()')
+XP_ACCESS = _untl_xpath('untl:rights[@qualifier="access"]/text()')
+XP_LANGUAGES = _untl_xpath('untl:language/text()')
+XP_PRESENTERS = _untl_xpath('untl:creator[normalize-space(untl:type)="per"]/untl:name/text()')
+XP_CONFERENCES = _untl_xpath('untl:source[@qualifier="conference"]/text()')
+XP_RELATIONS = _untl_xpath('untl:relation/text()')
+XP_RESOURCE_TYPE = _untl_xpath('untl:resourceType/text()')
+XP_CREATED_IN_YEAR = _untl_xpath(
+    'boolean((untl:date[@qualifier="creation"][normalize-space()])[1][contains(., $year)])')
+
+
+RDF_START = ("<?xml version='1.0' encoding='utf-8'?>\n<rdf:RDF "
+             + ' '.join(f'xmlns:{prefix}="{uri}"' for prefix, uri in NSMAP.items())
+             + '>\n')
+
+RDF_END = '</rdf:RDF>\n'
+
+PRESENTATION_TEMPLATE = """\
+  <bib:ConferenceProceedings rdf:about={about_uri}>
+    <z:itemType>presentation</z:itemType>
+    <dc:publisher>
+      <foaf:Organization>
+        <vcard:adr>
+          <vcard:Address>
+            <vcard:locality>{locality}</vcard:locality>
+          </vcard:Address>
+        </vcard:adr>
+      </foaf:Organization>
+    </dc:publisher>
+    <z:presenters>
+      <rdf:Seq>{presenters}
+      </rdf:Seq>
+    </z:presenters>{subjects}
+    <dc:title>{title}</dc:title>
+    <dcterms:abstract>{abstract}</dcterms:abstract>
+    <dc:date>{date}</dc:date>{languages}
+    <dc:identifier>
+      <dcterms:URI>
+        <rdf:value>{uri}</rdf:value>
+      </dcterms:URI>
+    </dc:identifier>
+    <dc:rights>{access}</dc:rights>
+    <dc:description>{description}</dc:description>
+    <z:meetingName>{meeting}</z:meetingName>
+  </bib:ConferenceProceedings>
+"""
 
-class ZoteroXML():
-    """Class for producing a Zotero RDF format file from ElementTree objects."""
+PRESENTER_TEMPLATE = """
+        <rdf:li>
+          <foaf:Person>
+            <foaf:surname>{surname}</foaf:surname>
+            <foaf:givenName>{given_name}</foaf:givenName>
+          </foaf:Person>
+        </rdf:li>"""
 
-    def __init__(self, records=[]):
-        self.records = records
 
-    def add_item_record(self, record_element):
-        """Add a single item record."""
-        self.records.append(record_element)
+class IncrementalZoteroWriter():
+    """Class for streaming Zotero RDF records to a file as they are generated.
 
-    def write_zotero_xml_file(self, output_path='zotero_rdf.xml'):
-        """Write an XML file in Zotero RDF format."""
-        rdf = ET.Element('{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF')
-        rdf.set('xmlns:z', 'http://www.zotero.org/namespaces/export#')
-        rdf.set('xmlns:dc', 'http://purl.org/dc/elements/1.1/')
-        rdf.set('xmlns:vcard', 'http://nwalsh.com/rdf/vCard#')
-        rdf.set('xmlns:foaf', 'http://xmlns.com/foaf/0.1/')
-        rdf.set('xmlns:dcterms', 'http://purl.org/dc/terms/')
-        rdf.set('xmlns:bib', 'http://purl.org/net/biblio#')
+    Use as a context manager; the RDF root element is opened on entry and
+    closed on exit, and each record is written out as soon as it is given.
+    Records go to a temporary file that only replaces output_path once the
+    block exits cleanly, so a failed run never leaves partial output behind.
+    When output_path is not a regular file (e.g. /dev/stdout) or its directory
+    is not writable, records are written to it directly instead.
+    """
 
-        rdf.extend(self.records)
-        tree = ET.ElementTree(rdf)
-        ET.indent(tree)
-        tree.write(output_path, encoding='utf-8', xml_declaration=True)
+    def __init__(self, output_path='zotero_rdf.xml'):
+        self.output_path = output_path
+        self.partial_path = None
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        if ((os.path.isfile(output_path) or not os.path.exists(output_path))
+                and os.access(output_dir, os.W_OK)):
+            self.partial_path = f'{output_path}.part'
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.partial_path or self.output_path, 'w', encoding='utf-8')
+        self._file.write(RDF_START)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            with self._file:
+                if exc_type is None:
+                    self._file.write(RDF_END)
+            if exc_type is None and self.partial_path:
+                os.replace(self.partial_path, self.output_path)
+        except BaseException:
+            self._discard_partial()
+            raise
+        if exc_type is not None:
+            self._discard_partial()
+
+    def _discard_partial(self):
+        """Remove the temporary output file, if one is in use."""
+        if self.partial_path:
+            os.remove(self.partial_path)
+
+    def write(self, record):
+        """Write a single item record rendered as an XML string."""
+        self._file.write(record)
+
+
+def _first_text(texts):
+    """Get the first non-empty stripped string from a list of XPath text results."""
+    for text in texts:
+        text = text.strip()
+        if text:
+            return text
+    return ''
+
+
+def _all_text(texts):
+    """Get all non-empty stripped strings from a list of XPath text results."""
+    return [text for text in map(str.strip, texts) if text]
+
+
+def split_meeting_info(conference_info):
+    """Split conference info into a meeting name ending in a year and a locality.
+
+    The meeting name is taken from the first line with a four digit group and
+    runs through the last such group on that line. A locality follows it after
+    ', ' or '. ' and stops at the next digit. Returns None when there is no
+    four digit group, and an empty locality when none is present.
+    """
+    line_start = 0
+    for line in conference_info.split('\n'):
+        for end in range(len(line), 3, -1):
+            if line[end - 4:end].isdecimal():
+                return line[:end], _leading_locality(conference_info[line_start + end:])
+        line_start += len(line) + 1
+    return None
+
+
+def _leading_locality(tail):
+    """Get the locality at the start of the text following a meeting name."""
+    if tail[:2] not in (', ', '. '):
+        return ''
+    locality = tail[2:]
+    for index, char in enumerate(locality):
+        if '0' <= char <= '9':
+            return locality[:index]
+    return locality
 
 
 class ZoteroItem():
-    """Base class for generating Zotero records from pyuntl data."""
-
-    def __init__(self, untl_data, **kwargs):
-        self.untl_data = untl_data
-        self.about_uri = self.get_about_uri()
-        self.title = self.get_title()
-        self.subjects = self.get_subjects()
-        self.abstract = self.get_abstract()
-        self.creation_date = self.get_creation_date()
-        self.access = self.get_access()
-        self.languages = self.get_languages()
-
-    def get_about_uri(self):
-        """Get itemURL."""
-        uri = ''
-        identifiers = self.untl_data.get('identifier', [])
-        for identifier in identifiers:
-            if identifier.get('qualifier', '') == 'itemURL':
-                uri = identifier.get('content', '')
-        return uri
-
-    def get_subjects(self):
-        """Get subjects."""
-        subjects = []
-        dc_subjects = self.untl_data.get('subject', [])
-        for subject in dc_subjects:
-            subject_value = subject.get('content', '')
-            if subject_value:
-                subjects.append(subject_value)
-        return subjects
-
-    def get_title(self):
-        """Get official title."""
-        official_title = ''
-        titles = self.untl_data.get('title', [])
-        for title in titles:
-            if title.get('qualifier', '') == 'officialtitle':
-                title_value = title.get('content', '')
-                if title_value:
-                    official_title = title_value
-                    break
-        return official_title
-
-    def get_abstract(self):
-        """Pull abstract from UNTL description."""
-        abstract = ''
-        descriptions = self.untl_data.get('description', [])
-        for description in descriptions:
-            if description.get('qualifier', '') == 'content':
-                text = description.get('content', '')
-                if text:
-                    abstract = text
-                    break
-        return abstract
-
-    def get_creation_date(self):
-        """Get date of creation."""
-        creation_date = ''
-        dates = self.untl_data.get('date', [])
-        for date in dates:
-            if date.get('qualifier', '') == 'creation':
-                date_value = date.get('content', '')
-                if date_value:
-                    creation_date = date_value
-                    break
-        return creation_date
-
-    def get_access(self):
-        """Get access rights."""
-        access = ''
-        rights = self.untl_data.get('rights', [])
-        for right in rights:
-            if right.get('qualifier', '') == 'access':
-                right_value = right.get('content', '')
-                if right_value:
-                    access = right_value
-                    break
-        return ACCESS.get(access, access)
-
-    def get_languages(self):
-        """Get list of languages of an item."""
-        language_list = []
-        languages = self.untl_data.get('language', [])
-        for language in languages:
-            language_value = language.get('content', '')
-            if language_value:
-                language_list.append(language_value)
-        return language_list
+    """Base class for generating Zotero records from UNTL metadata elements."""
+
+    def __init__(self, untl_root, **kwargs):
+        self.untl_root = untl_root
+        about_uris = _all_text(XP_ABOUT_URI(untl_root))
+        self.about_uri = about_uris[-1] if about_uris else ''
+        self.title = _first_text(XP_TITLE(untl_root))
+        self.subjects = _all_text(XP_SUBJECTS(untl_root))
+        self.abstract = _first_text(XP_ABSTRACT(untl_root))
+        self.creation_date = _first_text(XP_CREATION_DATE(untl_root))
+        access = _first_text(XP_ACCESS(untl_root))
+        self.access = ACCESS.get(access, access)
+        self.languages = _all_text(XP_LANGUAGES(untl_root))
 
 
 class ZoteroPresentation(ZoteroItem):
-    """Class to produce Zotero XML for a conference presentation from pyuntl data."""
+    """Class to produce Zotero XML for a conference presentation from UNTL metadata."""
 
-    def __init__(self, untl_data, **kwargs):
-        super().__init__(untl_data, **kwargs)
-        self.presenters = self.get_presenters()
-        self.relations = self.get_relations()
+    def __init__(self, untl_root, **kwargs):
+        super().__init__(untl_root, **kwargs)
+        self.presenters = self.get_presenters(_all_text(XP_PRESENTERS(untl_root)))
+        self.relations = _all_text(XP_RELATIONS(untl_root))
         self.description = self.get_description()
-        self.meeting, self.locality = self.get_meeting_name_locality()
+        self.meeting, self.locality = self.get_meeting_name_locality(
+            _all_text(XP_CONFERENCES(untl_root)))
 
     def generate_record(self):
-        """Generate Zotero RDF XML from a untl dictionary for a presentation."""
-        conference_proceedings = ET.Element('bib:ConferenceProceedings')
-        conference_proceedings.set('rdf:about', self.about_uri)
-        ET.SubElement(conference_proceedings, 'z:itemType').text = 'presentation'
-
-        publisher = ET.SubElement(conference_proceedings, 'dc:publisher')
-        organization = ET.SubElement(publisher, 'foaf:Organization')
-        adr = ET.SubElement(organization, 'vcard:adr')
-        address = ET.SubElement(adr, 'vcard:Address')
-        ET.SubElement(address, 'vcard:locality').text = self.locality
-
-        presenters_element = ET.SubElement(conference_proceedings, 'z:presenters')
-        seq = ET.SubElement(presenters_element, 'rdf:Seq')
-        for presenter in self.presenters:
-            li = ET.SubElement(seq, 'rdf:li')
-            person = ET.SubElement(li, 'foaf:Person')
-            ET.SubElement(person, 'foaf:surname').text = presenter['surname']
-            ET.SubElement(person, 'foaf:givenName').text = presenter['given_name']
-        for subject in self.subjects:
-            ET.SubElement(conference_proceedings, 'dc:subject').text = subject
-        ET.SubElement(conference_proceedings, 'dc:title').text = self.title
-        ET.SubElement(conference_proceedings, 'dcterms:abstract').text = self.abstract
-        ET.SubElement(conference_proceedings, 'dc:date').text = self.creation_date
-        for language in self.languages:
-            ET.SubElement(conference_proceedings, 'z:language').text = language
-        identifier = ET.SubElement(conference_proceedings, 'dc:identifier')
-        uri = ET.SubElement(identifier, 'dcterms:URI')
-        ET.SubElement(uri, 'rdf:value').text = self.about_uri
-        ET.SubElement(conference_proceedings, 'dc:rights').text = self.access
-        ET.SubElement(conference_proceedings, 'dc:description').text = self.description
-        ET.SubElement(conference_proceedings, 'z:meetingName').text = self.meeting
-        return conference_proceedings
-
-    def get_presenters(self):
-        """Get list of presenters"""
+        """Generate a Zotero RDF XML string for a presentation."""
+        presenters = ''.join(
+            PRESENTER_TEMPLATE.format(surname=escape(presenter['surname']),
+                                      given_name=escape(presenter['given_name']))
+            for presenter in self.presenters)
+        subjects = ''.join(f'\n    <dc:subject>{escape(subject)}</dc:subject>'
+                           for subject in self.subjects)
+        languages = ''.join(f'\n    <z:language>{escape(language)}</z:language>'
+                            for language in self.languages)
+        return PRESENTATION_TEMPLATE.format(
+            about_uri=quoteattr(self.about_uri),
+            locality=escape(self.locality),
+            presenters=presenters,
+            subjects=subjects,
+            title=escape(self.title),
+            abstract=escape(self.abstract),
+            date=escape(self.creation_date),
+            languages=languages,
+            uri=escape(self.about_uri),
+            access=escape(self.access),
+            description=escape(self.description),
+            meeting=escape(self.meeting),
+        )
+
+    def get_presenters(self, names):
+        """Get list of presenters from personal creator names."""
         presenters = []
-        creators = self.untl_data.get('creator', [])
-        for creator in creators:
-            if creator.get('content', {}).get('type', '') == 'per':
-                name = creator.get('content', {}).get('name', '')
-                if name:
-                    name_parts = name.split(',', 1)
-                    surname = name_parts[0].strip()
-                    given_name = ''
-                    if len(name_parts) == 2:
-                        given_name = name_parts[1].strip()
-                    presenters.append({'surname': surname,  'given_name': given_name})
+        append = presenters.append
+        for name in names:
+            surname, _, given_name = name.partition(',')
+            append({'surname': surname.strip(), 'given_name': given_name.strip()})
         return presenters
 
-    def get_meeting_name_locality(self):
-        """Parse meeting name and locality from publication info."""
+    def get_meeting_name_locality(self, conferences):
+        """Parse meeting name and locality from conference publication info."""
         meeting = ''
         locality = ''
-        sources = self.untl_data.get('source', [])
-        for source in sources:
-            if source.get('qualifier', '') == 'conference':
-                conference_info = source.get('content', '')
-                if conference_info:
-                    # Try and parse the info into a meeting name ending in a date,
-                    #  and a locality if present.
-                    info_match = MEETING_PATTERN.search(conference_info)
-                    if info_match:
-                        meeting = info_match.group('meeting')
-                        if info_match.group('locality') is not None:
-                            locality = info_match.group('locality').rstrip('.')
+        for conference_info in conferences:
+            # Try and parse the info into a meeting name ending in a date,
+            #  and a locality if present.
+            info = split_meeting_info(conference_info)
+            if info:
+                meeting = info[0]
+                if info[1]:
+                    locality = info[1].rstrip('.')
         return meeting, locality
 
-    def get_relations(self):
-        """Get related items."""
-        relationships = []
-        relations = self.untl_data.get('relation', [])
-        for relation in relations:
-            relation_value = relation.get('content', '')
-            if relation_value:
-                relationships.append(relation_value)
-        return relationships
-
     def get_description(self):
         """Generate description containing related items info."""
-        description = ''
-        if self.relations:
-            for relation in self.relations:
-                description += f'Related to: {relation}.\n'
-        return description
+        return ''.join(f'Related to: {relation}.\n' for relation in self.relations)
+
+
+def created_in_year(untl_root, year):
+    """Check whether the creation date of a UNTL metadata element contains year."""
+    return XP_CREATED_IN_YEAR(untl_root, year=year)
+
+
+def is_supported_type(untl_root):
+    """Check whether a UNTL metadata element has a resource type listed in TYPES."""
+    return _first_text(XP_RESOURCE_TYPE(untl_root)) in TYPES
+
+
+def iter_untl_records(untl_source, year=None):
+    """Yield the UNTL metadata element of each OAI-PMH record in untl_source.
+
+    Only records of a resource type we can convert are yielded, and if year
+    is given, only those created that year. Each record is freed once the
+    caller moves on to the next one.
+    """
+    # Only element text is read, so drop whitespace between elements, comments
+    # and processing instructions at parse time, and skip the xml:id lookup
+    # table. huge_tree lifts libxml2's limits on text node size and nesting,
+    # which large collection dumps can hit.
+    context = ET.iterparse(untl_source, events=('end',), tag=OAI_METADATA,
+                           remove_blank_text=True, remove_comments=True, remove_pis=True,
+                           resolve_entities=False, collect_ids=False, huge_tree=True)
+    for _, child in context:
+        untl_root = child[0]
+        if is_supported_type(untl_root) and (not year or created_in_year(untl_root, year)):
+            yield untl_root
+        # Free the parsed OAI records as we go rather than holding the whole document.
+        oai_record = child.getparent()
+        oai_record.clear()
+        while oai_record.getprevious() is not None:
+            del oai_record.getparent()[0]
+
+
+def convert_untl_records(untl_records):
+    """Generate Zotero RDF XML for a batch of serialized UNTL metadata records."""
+    return ''.join(ZoteroPresentation(ET.fromstring(untl_xml)).generate_record()
+                   for untl_xml in untl_records)
+
+
+def generate_records(untl_records, jobs=None):
+    """Yield Zotero RDF XML for UNTL metadata elements in their original order.
+
+    With more than one job, batches of records are serialized and converted
+    in a pool of jobs worker processes (one per CPU by default). With a
+    single job, or a single CPU, records are converted in this process.
+    """
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1:
+        for untl_root in untl_records:
+            yield ZoteroPresentation(untl_root).generate_record()
+        return
+    # Serialize each element before iter_untl_records frees it.
+    untl_xml = (ET.tostring(untl_root, with_tail=False) for untl_root in untl_records)
+    with ProcessPoolExecutor(workers) as pool:
+        # Keep a couple of batches queued per worker, without reading ahead
+        # through the whole collection.
+        max_pending = 2 * workers
+        pending = deque()
+        while True:
+            batch = list(islice(untl_xml, RECORDS_PER_BATCH))
+            if not batch:
+                break
+            pending.append(pool.submit(convert_untl_records, batch))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CachingReader():
+    """File-like wrapper that copies everything read from a stream to a cache file."""
+
+    def __init__(self, stream, cache_file):
+        self.stream = stream
+        self.cache_file = cache_file
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.cache_file.write(data)
+        return data
 
 
 def get_untl_collection(collection_id):
-    """Pull down UNTL metadata from a UNT Digital Library collection."""
+    """Open a stream of UNTL metadata from a UNT Digital Library collection."""
     metadata_url = (f'https://digital.library.unt.edu/explore/collections/'
                     f'{collection_id}/oai/?verb=ListRecords&metadataPrefix=untl')
     try:
-        return urlopen(metadata_url).read()
+        return urlopen(metadata_url)
     except Exception as err:
         sys.exit(f'{err}: {metadata_url}')
 
 
+@contextmanager
+def open_untl_metadata(collection_id, cache=False):
+    """Yield a source of UNTL metadata for iterparse.
+
+    With cache set, a previously cached file is reused if present; otherwise
+    the live metadata is written through to the cache file as it is parsed.
+    """
+    if cache and os.path.isfile(CACHE_FILE):
+        yield CACHE_FILE
+        return
+    with get_untl_collection(collection_id) as response:
+        if not cache:
+            yield response
+            return
+        try:
+            with open(CACHE_FILE, 'wb') as cache_file:
+                yield CachingReader(response, cache_file)
+        except BaseException:
+            # Don't leave a partial download behind to be reused as the cache.
+            os.remove(CACHE_FILE)
+            raise
+
+
+def positive_int(value):
+    """Parse a command line value as an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a positive integer')
+    return number
+
+
 def main():
     """Writes Zotero RDF metadata for UNTL objects to import into Zotero.
 
@@ -267,35 +429,22 @@ def main():
                         help='Limits items included in the Zotero RDF output'
                              ' to those accessioned in the given year')
     parser.add_argument('--cache',
-                        help='Use previously retrieved XML for your collection'
+                        help='Use previously retrieved XML for your collection,'
+                             ' saving it on the first run'
                              ' (helpful for dev/testing purposes)',
                         action='store_true')
+    parser.add_argument('-j', '--jobs',
+                        help='Number of worker processes used to convert records'
+                             ' (defaults to the number of CPUs)',
+                        type=positive_int)
     args = parser.parse_args()
 
-    if not os.path.isfile('cached_untl_metadata.xml') or not args.cache:
-        # Pull live metadata if not using cached version
-        untl_metadata = get_untl_collection(args.collection)
-        with open('cached_untl_metadata.xml', 'wb') as untl_f:
-            untl_f.write(untl_metadata)
-    tree = ET.parse('cached_untl_metadata.xml')
-    zotero_xml = ZoteroXML()
-    for child in tree.iter('{http://www.openarchives.org/OAI/2.0/}metadata'):
-        untl_root = child[0]
-        untl_dict = pyuntl.untldoc.untlxml2pydict(BytesIO(ET.tostring(untl_root, 'utf-8')))
+    with open_untl_metadata(args.collection, args.cache) as untl_source, \
+            IncrementalZoteroWriter(args.output) as zotero_writer:
         # If year is specified, only process items created that year.
-        if args.year:
-            creation_date = None
-            for untl_date in untl_dict.get('date', []):
-                if untl_date.get('qualifier', '') == 'creation':
-                    creation_date = untl_date.get('content', '')
-                    break
-            if not creation_date or args.year not in creation_date:
-                # Creation date is not the year indicated by user.
-                continue
-        record = ZoteroPresentation(untl_dict)
-        presentation = record.generate_record()
-        zotero_xml.add_item_record(presentation)
-    zotero_xml.write_zotero_xml_file(args.output)
+        untl_records = iter_untl_records(untl_source, args.year)
+        for record in generate_records(untl_records, args.jobs):
+            zotero_writer.write(record)
 
 
 if __name__ == '__main__':